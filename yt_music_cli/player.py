@@ -8,16 +8,87 @@ import subprocess
 import sys
 import os
 import json
+import shutil
+import socket
+import stat
+import tempfile
 import threading
 import time
 import signal
+import atexit
+from collections import deque
 
 try:
-    from ytmusicapi import YTMusic
+    import readline
 except ImportError:
-    print("Installing ytmusicapi...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "ytmusicapi", "-q", "--break-system-packages"])
-    from ytmusicapi import YTMusic
+    readline = None
+
+HISTORY_FILE = os.path.expanduser('~/.ytmusic_history')
+
+
+def _import_ytmusic():
+    """Import YTMusic on first use, installing ytmusicapi if missing"""
+    try:
+        from ytmusicapi import YTMusic
+    except ImportError:
+        print("Installing ytmusicapi...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "ytmusicapi", "-q", "--break-system-packages"])
+        from ytmusicapi import YTMusic
+    return YTMusic
+
+
+def _private_runtime_dir():
+    """Directory only this user can enter, for the mpv IPC socket"""
+    # mpv's IPC accepts arbitrary commands (including 'run'), so the socket
+    # must not be reachable by other local users
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        try:
+            st = os.stat(runtime_dir)
+        except OSError:
+            st = None
+        # Only trust it when it is ours and private, not e.g. a world-writable /tmp
+        if (st and stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+                and stat.S_IMODE(st.st_mode) == 0o700):
+            return runtime_dir
+    runtime_dir = tempfile.mkdtemp(prefix='ytmusic-')
+    atexit.register(shutil.rmtree, runtime_dir, ignore_errors=True)
+    return runtime_dir
+
+
+class _YDLLogger:
+    """Silence yt-dlp output; failures are reported through exceptions"""
+    def debug(self, msg):
+        pass
+    info = warning = error = debug
+
+
+_YDL_OPTS = {
+    'format': 'bestaudio/best',
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'logger': _YDLLogger(),
+    'cookiesfrombrowser': ('firefox',),
+    'extractor_args': {'youtube': {'player_client': ['default', '-android_sdkless']}},
+    'remote_components': ['ejs:github'],
+}
+_YDL = None
+_YDL_LOCK = threading.Lock()
+
+
+def _youtube_dl():
+    """Shared in-process YoutubeDL instance, or None if yt_dlp can't be imported"""
+    global _YDL
+    # Overlapping prefetch threads must not each build (and load cookies for) their own
+    with _YDL_LOCK:
+        if _YDL is None:
+            try:
+                from yt_dlp import YoutubeDL
+            except ImportError:
+                return None
+            _YDL = YoutubeDL(_YDL_OPTS)
+        return _YDL
 
 
 class Colors:
@@ -33,38 +104,135 @@ class Colors:
     RESET = '\033[0m'
 
 
+# Static pieces of list rendering, so per-line f-strings only fill in the data
+_RESULTS_HEADER = f"\n{Colors.BOLD}  Search Results:{Colors.RESET}\n\n"
+_QUEUE_HEADER = f"\n{Colors.BOLD}  Current Queue:{Colors.RESET}\n\n"
+_NUM_OPEN = f"  {Colors.CYAN}"
+_NUM_CLOSE = f".{Colors.RESET} "
+_DETAIL_OPEN = f"{Colors.RESET}\n      {Colors.DIM}"
+_LINE_END = f"{Colors.RESET}\n"
+_PROMPT = f"{Colors.BOLD}  >{Colors.RESET} "
+# readline needs non-printing escapes wrapped in \001/\002 to measure the prompt
+_READLINE_PROMPT = f"\001{Colors.BOLD}\002  >\001{Colors.RESET}\002 "
+
+# Fixed screens and the now-playing block, with colour codes already applied
+_HEADER = (
+    f"{Colors.CYAN}{Colors.BOLD}\n"
+    "  ╔═══════════════════════════════════════════════════════╗\n"
+    "  ║           🎵  YouTube Music CLI Player  🎵            ║\n"
+    "  ╚═══════════════════════════════════════════════════════╝\n"
+    f"{Colors.RESET}\n"
+)
+_HELP = f"""
+{Colors.BOLD}  Commands:{Colors.RESET}
+
+  {Colors.CYAN}s, search <query>{Colors.RESET}    - Search for songs
+  {Colors.CYAN}sa <query>{Colors.RESET}           - Search for albums  
+  {Colors.CYAN}sp <query>{Colors.RESET}           - Search for playlists
+  
+  {Colors.CYAN}p, play <number>{Colors.RESET}     - Play track from results
+  {Colors.CYAN}a, add <number>{Colors.RESET}      - Add track to queue
+  {Colors.CYAN}pa, playall{Colors.RESET}          - Add all results to queue and play
+  
+  {Colors.CYAN}space, pause{Colors.RESET}         - Toggle pause/play
+  {Colors.CYAN}n, next{Colors.RESET}              - Next track
+  {Colors.CYAN}b, prev{Colors.RESET}              - Previous track
+  {Colors.CYAN}stop{Colors.RESET}                 - Stop playback
+  
+  {Colors.CYAN}q, queue{Colors.RESET}             - Show queue
+  {Colors.CYAN}cq, clear{Colors.RESET}            - Clear queue
+  
+  {Colors.CYAN}+, -{Colors.RESET}                 - Seek forward/backward 10s
+  {Colors.CYAN}v <0-100>{Colors.RESET}            - Set volume
+  
+  {Colors.CYAN}h, help{Colors.RESET}              - Show this help
+  {Colors.CYAN}x, exit{Colors.RESET}              - Exit player
+
+"""
+_STATUS_PLAYING = f"\n{Colors.GREEN}{Colors.BOLD}  ▶ Playing:{Colors.RESET}\n"
+_STATUS_PAUSED = f"\n{Colors.GREEN}{Colors.BOLD}  ⏸ Paused:{Colors.RESET}\n"
+_STATUS_STOPPED = f"\n{Colors.GREEN}{Colors.BOLD}  ⏹ Stopped:{Colors.RESET}\n"
+_TRACK_OPEN = f"  {Colors.YELLOW}♪{Colors.RESET} "
+_BY_OPEN = f"\n  {Colors.DIM}  by "
+_DURATION_OPEN = f"  {Colors.DIM}  Duration: "
+
+
 class YTMusicPlayer:
+    # Pre-encoded IPC messages for the commands sent on every keystroke
+    _CMD_TOGGLE = b'{"command":["cycle","pause"]}\n'
+    _CMD_SEEK = {
+        10: b'{"command":["seek","10"]}\n',
+        -10: b'{"command":["seek","-10"]}\n',
+    }
+    # How soon after starting a failed prefetched stream is retried via its watch URL
+    _PREFETCH_RETRY_SECS = 5
+    _MPV_ARGS = (
+        'mpv', '--no-video', '--really-quiet', '--terminal=no',
+        # Read ahead so short bandwidth dips don't cause underruns
+        '--cache=yes', '--cache-secs=30', '--demuxer-max-bytes=50M', '--demuxer-readahead-secs=20',
+        '--ytdl-format=bestaudio[ext=m4a]/bestaudio',
+    )
+    
     def __init__(self):
-        self.ytmusic = YTMusic()
-        self.queue = []
+        self._ytmusic = None
+        self.queue = deque()
         self.current_index = 0
         self.mpv_process = None
         self.is_playing = False
         self.is_paused = False
         self.current_track = None
-        self.mpv_socket = f"/tmp/ytmusic_mpv_{os.getpid()}"
+        self.mpv_socket = os.path.join(_private_runtime_dir(), f"ytmusic_mpv_{os.getpid()}")
+        self._mpv_cmd_prefix = [*self._MPV_ARGS, f'--input-ipc-server={self.mpv_socket}']
+        self._mpv_sock = None
+        self._url_cache = {}
         self.playback_thread = None
         self.stop_event = threading.Event()
+        self._running = False
+        self._handlers = {
+            'x': self._cmd_exit, 'exit': self._cmd_exit, 'quit': self._cmd_exit,
+            'h': self._cmd_help, 'help': self._cmd_help,
+            's': self._cmd_search, 'search': self._cmd_search,
+            'sa': self._cmd_search_albums,
+            'sp': self._cmd_search_playlists,
+            'p': self._cmd_play, 'play': self._cmd_play,
+            'a': self._cmd_add, 'add': self._cmd_add,
+            'pa': self._cmd_playall, 'playall': self._cmd_playall,
+            'space': self._cmd_pause, 'pause': self._cmd_pause,
+            'n': self._cmd_next, 'next': self._cmd_next,
+            'b': self._cmd_prev, 'prev': self._cmd_prev,
+            'stop': self._cmd_stop,
+            'q': self._cmd_queue, 'queue': self._cmd_queue,
+            'cq': self._cmd_clear, 'clear': self._cmd_clear,
+            '+': self._cmd_seek_forward,
+            '-': self._cmd_seek_back,
+            'v': self._cmd_volume,
+            'cls': self._cmd_cls,
+        }
         
+    @property
+    def ytmusic(self):
+        """YTMusic client, created on the first search"""
+        if self._ytmusic is None:
+            self._ytmusic = _import_ytmusic()()
+        return self._ytmusic
+    
     def clear_screen(self):
-        os.system('clear')
+        # Home cursor, clear screen and scrollback without spawning clear(1)
+        sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
+        sys.stdout.flush()
         
     def print_header(self):
-        print(f"{Colors.CYAN}{Colors.BOLD}")
-        print("  ╔═══════════════════════════════════════════════════════╗")
-        print("  ║           🎵  YouTube Music CLI Player  🎵            ║")
-        print("  ╚═══════════════════════════════════════════════════════╝")
-        print(f"{Colors.RESET}")
+        sys.stdout.write(_HEADER)
         
     def print_now_playing(self):
+        out = []
         if self.current_track:
-            status = "▶ Playing" if self.is_playing and not self.is_paused else "⏸ Paused" if self.is_paused else "⏹ Stopped"
-            print(f"\n{Colors.GREEN}{Colors.BOLD}  {status}:{Colors.RESET}")
-            print(f"  {Colors.YELLOW}♪{Colors.RESET} {self.current_track['title']}")
-            print(f"  {Colors.DIM}  by {self.current_track['artist']}{Colors.RESET}")
+            status = _STATUS_PLAYING if self.is_playing and not self.is_paused else _STATUS_PAUSED if self.is_paused else _STATUS_STOPPED
+            out.append(f"{status}{_TRACK_OPEN}{self.current_track['title']}{_BY_OPEN}{self.current_track['artist']}{_LINE_END}")
             if 'duration' in self.current_track:
-                print(f"  {Colors.DIM}  Duration: {self.current_track['duration']}{Colors.RESET}")
-        print()
+                out.append(f"{_DURATION_OPEN}{self.current_track['duration']}{_LINE_END}")
+        out.append('\n')
+        sys.stdout.write(''.join(out))
         
     def search(self, query, filter_type='songs'):
         """Search YouTube Music"""
@@ -76,55 +244,97 @@ class YTMusicPlayer:
             print(f"{Colors.RED}  Error searching: {e}{Colors.RESET}")
             return []
     
+    def _fmt_artists(self, item):
+        """Comma-separated artist names, cached on the item after first use"""
+        artists = item.get('_artists_str')
+        if artists is None:
+            artists = ', '.join(a['name'] for a in item.get('artists', ())) or 'Unknown Artist'
+            item['_artists_str'] = artists
+        return artists
+    
     def display_results(self, results, result_type='songs'):
         """Display search results"""
         if not results:
             print(f"{Colors.YELLOW}  No results found.{Colors.RESET}")
             return
             
-        print(f"\n{Colors.BOLD}  Search Results:{Colors.RESET}\n")
-        
+        out = [_RESULTS_HEADER]
         for i, item in enumerate(results, 1):
+            title = item.get('title', 'Unknown')
             if result_type == 'songs':
-                title = item.get('title', 'Unknown')
-                artists = ', '.join([a['name'] for a in item.get('artists', [])]) or 'Unknown Artist'
-                duration = item.get('duration', '')
-                print(f"  {Colors.CYAN}{i:2}.{Colors.RESET} {title}")
-                print(f"      {Colors.DIM}{artists} • {duration}{Colors.RESET}")
+                detail = f"{self._fmt_artists(item)} • {item.get('duration', '')}"
             elif result_type == 'playlists':
-                title = item.get('title', 'Unknown')
-                author = item.get('author', 'Unknown')
-                print(f"  {Colors.CYAN}{i:2}.{Colors.RESET} {title}")
-                print(f"      {Colors.DIM}by {author}{Colors.RESET}")
+                detail = f"by {item.get('author', 'Unknown')}"
             elif result_type == 'albums':
-                title = item.get('title', 'Unknown')
-                artists = ', '.join([a['name'] for a in item.get('artists', [])]) or 'Unknown Artist'
-                year = item.get('year', '')
-                print(f"  {Colors.CYAN}{i:2}.{Colors.RESET} {title}")
-                print(f"      {Colors.DIM}{artists} • {year}{Colors.RESET}")
-        print()
+                detail = f"{self._fmt_artists(item)} • {item.get('year', '')}"
+            else:
+                continue
+            out.append(f"{_NUM_OPEN}{i:2}{_NUM_CLOSE}{title}{_DETAIL_OPEN}{detail}{_LINE_END}")
+        out.append('\n')
+        sys.stdout.write(''.join(out))
         
-    def get_stream_url(self, video_id):
-        """Get audio stream URL using yt-dlp"""
+    def get_stream_url(self, video_id, quiet=False):
+        """Get audio stream URL using yt-dlp; quiet suppresses error output"""
+        stream = self.get_stream(video_id, quiet)
+        return stream[0] if stream else None
+    
+    def get_stream(self, video_id, quiet=False):
+        """Get (audio stream URL, HTTP headers it must be fetched with), or None"""
+        ydl = _youtube_dl()
+        if ydl is None:
+            return self._get_stream_cli(video_id, quiet)
+        try:
+            # YoutubeDL isn't thread-safe and prefetches may overlap
+            with _YDL_LOCK:
+                try:
+                    info = ydl.extract_info(f'https://music.youtube.com/watch?v={video_id}', download=False)
+                except Exception:
+                    info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+            return info['url'], info.get('http_headers') or {}
+        except Exception as e:
+            if not quiet:
+                print(f"{Colors.RED}  Error getting stream: {e}{Colors.RESET}")
+            return None
+    
+    def _get_stream_cli(self, video_id, quiet=False):
+        """Get audio stream URL and headers by running the yt-dlp executable"""
         try:
             cmd = [
                 'yt-dlp',
                 '-f', 'bestaudio',
-                '--cookies-from-browser Firefox --extrator-args "youtube:player_client=default,-android_sdkless" --remote-components ejs:github',
+                '--print', '%(url)s',
+                '--print', '%(http_headers)j',
+                '--no-warnings',
+                '--cookies-from-browser', 'firefox',
+                '--extractor-args', 'youtube:player_client=default,-android_sdkless',
+                '--remote-components', 'ejs:github',
                 f'https://music.youtube.com/watch?v={video_id}'
             ]
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
+            if result.returncode != 0:
                 cmd[-1] = f'https://www.youtube.com/watch?v={video_id}'
                 result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                return result.stdout.strip() if result.returncode == 0 else None
+                if result.returncode != 0:
+                    return None
+            url, headers = result.stdout.strip().split('\n', 1)
+            return url, json.loads(headers)
         except Exception as e:
-            print(f"{Colors.RED}  Error getting stream: {e}{Colors.RESET}")
+            if not quiet:
+                print(f"{Colors.RED}  Error getting stream: {e}{Colors.RESET}")
             return None
     
-    def play_track(self, track_info):
+    def _mpv_header_args(self, headers):
+        """mpv options that make it send the headers yt-dlp resolved the URL with"""
+        args = []
+        for name, value in headers.items():
+            if name.lower() == 'user-agent':
+                args.append(f'--user-agent={value}')
+            else:
+                # -append adds one entry without splitting on the commas values may contain
+                args.append(f'--http-header-fields-append={name}: {value}')
+        return args
+    
+    def play_track(self, track_info, use_prefetched=True):
         """Play a single track"""
         self.stop_playback()
         
@@ -134,7 +344,7 @@ class YTMusicPlayer:
             return False
             
         title = track_info.get('title', 'Unknown')
-        artists = ', '.join([a['name'] for a in track_info.get('artists', [])]) or 'Unknown Artist'
+        artists = self._fmt_artists(track_info)
         duration = track_info.get('duration', '')
         
         self.current_track = {
@@ -147,30 +357,38 @@ class YTMusicPlayer:
         print(f"\n{Colors.CYAN}  Loading: {title}...{Colors.RESET}")
         
         try:
-            url = f'https://www.youtube.com/watch?v={video_id}'
-            
-            cmd = [
-                'mpv',
-                '--no-video',
-                '--really-quiet',
-                f'--input-ipc-server={self.mpv_socket}',
-                '--terminal=no',
-                url
-            ]
+            # A prefetched direct stream URL lets mpv skip its own yt-dlp lookup
+            stream = self._url_cache.pop(video_id, None) if use_prefetched else None
+            prefetched = stream is not None
+            if prefetched:
+                url, headers = stream
+                cmd = self._mpv_cmd_prefix + self._mpv_header_args(headers) + [url]
+            else:
+                cmd = self._mpv_cmd_prefix + [f'https://www.youtube.com/watch?v={video_id}']
             
             self.mpv_process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                stderr=subprocess.DEVNULL,
+                # Keep Ctrl+C at the prompt from reaching mpv as well
+                start_new_session=True
             )
             
             self.is_playing = True
             self.is_paused = False
+            self._connect_mpv_socket(timeout=0.05)
             
             self.stop_event.clear()
-            self.playback_thread = threading.Thread(target=self._monitor_playback, daemon=True)
+            self.playback_thread = threading.Thread(
+                target=self._monitor_playback,
+                args=(self.mpv_process, track_info, prefetched, time.monotonic()),
+                daemon=True
+            )
             self.playback_thread.start()
             
+            if self.current_index + 1 < len(self.queue):
+                threading.Thread(target=self._prefetch, args=(self.current_index + 1,), daemon=True).start()
+            
             return True
             
         except FileNotFoundError:
@@ -180,35 +398,102 @@ class YTMusicPlayer:
             print(f"{Colors.RED}  Error playing track: {e}{Colors.RESET}")
             return False
     
-    def _monitor_playback(self):
-        """Monitor mpv process and auto-play next in queue"""
-        while not self.stop_event.is_set() and self.mpv_process:
-            if self.mpv_process.poll() is not None:
-                self.is_playing = False
-                if not self.stop_event.is_set() and self.current_index < len(self.queue) - 1:
-                    self.current_index += 1
-                    self.play_track(self.queue[self.current_index])
-                break
-            time.sleep(0.5)
+    def _prefetch(self, index):
+        """Resolve the stream URL of a queued track ahead of time"""
+        try:
+            video_id = self.queue[index].get('videoId')
+        except IndexError:
+            return
+        if video_id and video_id not in self._url_cache:
+            # Runs behind the prompt, so failures stay silent and mpv resolves the track itself
+            stream = self.get_stream(video_id, quiet=True)
+            if stream:
+                # Only the upcoming track is kept, so skipped tracks don't leave expiring URLs behind
+                self._url_cache = {video_id: stream}
+    
+    def _monitor_playback(self, process, track_info, prefetched, started):
+        """Wait for mpv to exit and auto-play next in queue"""
+        process.wait()
+        # stop_playback sets stop_event before terminating mpv, so a set event
+        # (or a newer process) means this exit was not the track ending
+        if self.stop_event.is_set() or process is not self.mpv_process:
+            return
+        if prefetched and process.returncode != 0 and time.monotonic() - started < self._PREFETCH_RETRY_SECS:
+            # The prefetched URL was rejected or expired; retry with the watch URL.
+            # Later failures happen mid-song, where restarting from 0:00 would be worse.
+            self.play_track(track_info, use_prefetched=False)
+            return
+        self.is_playing = False
+        if self.current_index < len(self.queue) - 1:
+            self.current_index += 1
+            self.play_track(self.queue[self.current_index])
+    
+    def _connect_mpv_socket(self, timeout=0.0):
+        """Open the persistent IPC connection, waiting up to timeout for mpv to listen
+
+        Returns the connected socket, or None if mpv isn't accepting connections.
+        """
+        self._close_mpv_socket()
+        deadline = time.monotonic() + timeout
+        while True:
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                client.connect(self.mpv_socket)
+                # Commands are fire-and-forget, so never let a full buffer block the UI
+                client.setblocking(False)
+                self._mpv_sock = client
+                return client
+            except OSError:
+                client.close()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.005)
+    
+    def _close_mpv_socket(self):
+        """Close the persistent IPC connection if open"""
+        sock, self._mpv_sock = self._mpv_sock, None
+        if sock:
+            sock.close()
     
     def send_mpv_command(self, command):
         """Send command to mpv via IPC socket"""
-        if not os.path.exists(self.mpv_socket):
+        return self._send_mpv_payload(json.dumps({"command": command}, separators=(',', ':')).encode() + b'\n')
+    
+    def _send_mpv_payload(self, payload):
+        """Send an already encoded IPC message to mpv with a raw write on the socket fd"""
+        # Work on a local reference: the monitor thread may close and replace
+        # self._mpv_sock mid-send. A closed socket reports fileno() -1, so the
+        # write fails with EBADF rather than landing on a reused descriptor.
+        # mpv may not have created its socket yet when play_track returned.
+        sock = self._mpv_sock or self._connect_mpv_socket()
+        if sock is None:
             return False
         try:
-            import socket
-            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            client.connect(self.mpv_socket)
-            client.send((json.dumps({"command": command}) + '\n').encode())
-            client.close()
-            return True
-        except:
+            sent = os.write(sock.fileno(), payload)
+        except BrokenPipeError:
+            sock = self._connect_mpv_socket()
+            if sock is None:
+                return False
+            try:
+                sent = os.write(sock.fileno(), payload)
+            except OSError:
+                return False
+        except BlockingIOError:
+            # mpv isn't draining its socket; dropping one keystroke beats stalling
+            return False
+        except OSError:
+            return False
+        if sent < len(payload):
+            # mpv reads line by line, so reconnect rather than leave half a command behind
+            if self._mpv_sock is sock:
+                self._close_mpv_socket()
             return False
+        return True
     
     def toggle_pause(self):
         """Toggle pause/play"""
         if self.mpv_process and self.is_playing:
-            self.send_mpv_command(["cycle", "pause"])
+            self._send_mpv_payload(self._CMD_TOGGLE)
             self.is_paused = not self.is_paused
             return True
         return False
@@ -216,20 +501,20 @@ class YTMusicPlayer:
     def stop_playback(self):
         """Stop current playback"""
         self.stop_event.set()
+        self._close_mpv_socket()
         if self.mpv_process:
             self.mpv_process.terminate()
             try:
                 self.mpv_process.wait(timeout=2)
-            except:
+            except subprocess.TimeoutExpired:
                 self.mpv_process.kill()
             self.mpv_process = None
-        self.is_playing = False
-        self.is_paused = False
-        if os.path.exists(self.mpv_socket):
             try:
                 os.remove(self.mpv_socket)
-            except:
+            except FileNotFoundError:
                 pass
+        self.is_playing = False
+        self.is_paused = False
     
     def add_to_queue(self, track_info):
         """Add track to queue"""
@@ -243,19 +528,18 @@ class YTMusicPlayer:
             print(f"\n{Colors.YELLOW}  Queue is empty.{Colors.RESET}")
             return
             
-        print(f"\n{Colors.BOLD}  Current Queue:{Colors.RESET}\n")
+        out = [_QUEUE_HEADER]
         for i, track in enumerate(self.queue):
             prefix = "▶ " if i == self.current_index and self.is_playing else "  "
             color = Colors.GREEN if i == self.current_index else Colors.RESET
             title = track.get('title', 'Unknown')
-            artists = ', '.join([a['name'] for a in track.get('artists', [])]) or 'Unknown Artist'
-            print(f"  {color}{prefix}{i+1}. {title}{Colors.RESET}")
-            print(f"      {Colors.DIM}{artists}{Colors.RESET}")
-        print()
+            out.append(f"  {color}{prefix}{i+1}. {title}{_DETAIL_OPEN}{self._fmt_artists(track)}{_LINE_END}")
+        out.append('\n')
+        sys.stdout.write(''.join(out))
     
     def clear_queue(self):
         """Clear the queue"""
-        self.queue = []
+        self.queue.clear()
         self.current_index = 0
         print(f"{Colors.YELLOW}  Queue cleared.{Colors.RESET}")
     
@@ -278,7 +562,11 @@ class YTMusicPlayer:
     def seek(self, seconds):
         """Seek forward/backward"""
         if self.is_playing:
-            self.send_mpv_command(["seek", str(seconds)])
+            payload = self._CMD_SEEK.get(seconds)
+            if payload:
+                self._send_mpv_payload(payload)
+            else:
+                self.send_mpv_command(["seek", str(seconds)])
     
     def set_volume(self, volume):
         """Set volume (0-100)"""
@@ -287,31 +575,129 @@ class YTMusicPlayer:
     
     def print_help(self):
         """Print help message"""
-        print(f"""
-{Colors.BOLD}  Commands:{Colors.RESET}
+        sys.stdout.write(_HELP)
 
-  {Colors.CYAN}s, search <query>{Colors.RESET}    - Search for songs
-  {Colors.CYAN}sa <query>{Colors.RESET}           - Search for albums  
-  {Colors.CYAN}sp <query>{Colors.RESET}           - Search for playlists
-  
-  {Colors.CYAN}p, play <number>{Colors.RESET}     - Play track from results
-  {Colors.CYAN}a, add <number>{Colors.RESET}      - Add track to queue
-  {Colors.CYAN}pa, playall{Colors.RESET}          - Add all results to queue and play
-  
-  {Colors.CYAN}space, pause{Colors.RESET}         - Toggle pause/play
-  {Colors.CYAN}n, next{Colors.RESET}              - Next track
-  {Colors.CYAN}b, prev{Colors.RESET}              - Previous track
-  {Colors.CYAN}stop{Colors.RESET}                 - Stop playback
-  
-  {Colors.CYAN}q, queue{Colors.RESET}             - Show queue
-  {Colors.CYAN}cq, clear{Colors.RESET}            - Clear queue
-  
-  {Colors.CYAN}+, -{Colors.RESET}                 - Seek forward/backward 10s
-  {Colors.CYAN}v <0-100>{Colors.RESET}            - Set volume
-  
-  {Colors.CYAN}h, help{Colors.RESET}              - Show this help
-  {Colors.CYAN}x, exit{Colors.RESET}              - Exit player
-""")
+    # Command handlers take (arg, results, result_type) and return the updated (results, result_type)
+    
+    def _cmd_exit(self, arg, results, result_type):
+        self.stop_playback()
+        print(f"\n{Colors.CYAN}  Goodbye! 🎵{Colors.RESET}\n")
+        self._running = False
+        return results, result_type
+    
+    def _cmd_help(self, arg, results, result_type):
+        self.print_help()
+        return results, result_type
+    
+    def _search_command(self, arg, results, result_type, filter_type, usage):
+        if not arg:
+            print(f"{Colors.YELLOW}  Usage: {usage}{Colors.RESET}")
+            return results, result_type
+        results = self.search(arg, filter_type)
+        self.display_results(results, filter_type)
+        return results, filter_type
+    
+    def _cmd_search(self, arg, results, result_type):
+        return self._search_command(arg, results, result_type, 'songs', 'search <query>')
+    
+    def _cmd_search_albums(self, arg, results, result_type):
+        return self._search_command(arg, results, result_type, 'albums', 'sa <query>')
+    
+    def _cmd_search_playlists(self, arg, results, result_type):
+        return self._search_command(arg, results, result_type, 'playlists', 'sp <query>')
+    
+    def _cmd_play(self, arg, results, result_type):
+        if arg.isdigit():
+            idx = int(arg) - 1
+            if 0 <= idx < len(results):
+                if result_type == 'songs':
+                    self.queue.clear()
+                    self.queue.append(results[idx])
+                    self.current_index = 0
+                    self.play_track(results[idx])
+                else:
+                    print(f"{Colors.YELLOW}  Can only play songs directly. Use search first.{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}  Invalid selection.{Colors.RESET}")
+        else:
+            print(f"{Colors.YELLOW}  Usage: play <number>{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_add(self, arg, results, result_type):
+        if arg.isdigit():
+            idx = int(arg) - 1
+            if 0 <= idx < len(results) and result_type == 'songs':
+                self.add_to_queue(results[idx])
+            else:
+                print(f"{Colors.RED}  Invalid selection.{Colors.RESET}")
+        else:
+            print(f"{Colors.YELLOW}  Usage: add <number>{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_playall(self, arg, results, result_type):
+        if results and result_type == 'songs':
+            self.queue.clear()
+            self.queue.extend(results)
+            self.current_index = 0
+            print(f"{Colors.GREEN}  Added {len(results)} tracks to queue.{Colors.RESET}")
+            self.play_track(self.queue[0])
+        else:
+            print(f"{Colors.YELLOW}  No songs to add.{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_pause(self, arg, results, result_type):
+        if self.toggle_pause():
+            status = "Paused" if self.is_paused else "Resumed"
+            print(f"{Colors.GREEN}  {status}{Colors.RESET}")
+        else:
+            print(f"{Colors.YELLOW}  Nothing playing.{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_next(self, arg, results, result_type):
+        self.next_track()
+        return results, result_type
+    
+    def _cmd_prev(self, arg, results, result_type):
+        self.prev_track()
+        return results, result_type
+    
+    def _cmd_stop(self, arg, results, result_type):
+        self.stop_playback()
+        print(f"{Colors.YELLOW}  Playback stopped.{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_queue(self, arg, results, result_type):
+        self.show_queue()
+        return results, result_type
+    
+    def _cmd_clear(self, arg, results, result_type):
+        self.stop_playback()
+        self.clear_queue()
+        return results, result_type
+    
+    def _cmd_seek_forward(self, arg, results, result_type):
+        self.seek(10)
+        print(f"{Colors.DIM}  >> 10s{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_seek_back(self, arg, results, result_type):
+        self.seek(-10)
+        print(f"{Colors.DIM}  << 10s{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_volume(self, arg, results, result_type):
+        if arg.isdigit():
+            vol = max(0, min(100, int(arg)))
+            self.set_volume(vol)
+            print(f"{Colors.DIM}  Volume: {vol}%{Colors.RESET}")
+        else:
+            print(f"{Colors.YELLOW}  Usage: v <0-100>{Colors.RESET}")
+        return results, result_type
+    
+    def _cmd_cls(self, arg, results, result_type):
+        self.clear_screen()
+        self.print_header()
+        return results, result_type
 
     def run(self):
         """Main loop"""
@@ -321,11 +707,15 @@ class YTMusicPlayer:
         
         results = []
         result_type = 'songs'
+        self._running = True
+        # input() only goes through readline on a terminal; elsewhere the markers would be printed
+        use_readline = readline is not None and sys.stdin.isatty() and sys.stdout.isatty()
+        prompt = _READLINE_PROMPT if use_readline else _PROMPT
         
-        while True:
+        while self._running:
             try:
                 self.print_now_playing()
-                cmd = input(f"{Colors.BOLD}  >{Colors.RESET} ").strip()
+                cmd = input(prompt).strip()
                 
                 if not cmd:
                     continue
@@ -334,116 +724,9 @@ class YTMusicPlayer:
                 action = parts[0].lower()
                 arg = parts[1] if len(parts) > 1 else ""
                 
-                if action in ['x', 'exit', 'quit']:
-                    self.stop_playback()
-                    print(f"\n{Colors.CYAN}  Goodbye! 🎵{Colors.RESET}\n")
-                    break
-                    
-                elif action in ['h', 'help']:
-                    self.print_help()
-                    
-                elif action in ['s', 'search']:
-                    if arg:
-                        results = self.search(arg, 'songs')
-                        result_type = 'songs'
-                        self.display_results(results, result_type)
-                    else:
-                        print(f"{Colors.YELLOW}  Usage: search <query>{Colors.RESET}")
-                        
-                elif action == 'sa':
-                    if arg:
-                        results = self.search(arg, 'albums')
-                        result_type = 'albums'
-                        self.display_results(results, result_type)
-                    else:
-                        print(f"{Colors.YELLOW}  Usage: sa <query>{Colors.RESET}")
-                        
-                elif action == 'sp':
-                    if arg:
-                        results = self.search(arg, 'playlists')
-                        result_type = 'playlists'
-                        self.display_results(results, result_type)
-                    else:
-                        print(f"{Colors.YELLOW}  Usage: sp <query>{Colors.RESET}")
-                        
-                elif action in ['p', 'play']:
-                    if arg.isdigit():
-                        idx = int(arg) - 1
-                        if 0 <= idx < len(results):
-                            if result_type == 'songs':
-                                self.queue = [results[idx]]
-                                self.current_index = 0
-                                self.play_track(results[idx])
-                            else:
-                                print(f"{Colors.YELLOW}  Can only play songs directly. Use search first.{Colors.RESET}")
-                        else:
-                            print(f"{Colors.RED}  Invalid selection.{Colors.RESET}")
-                    else:
-                        print(f"{Colors.YELLOW}  Usage: play <number>{Colors.RESET}")
-                        
-                elif action in ['a', 'add']:
-                    if arg.isdigit():
-                        idx = int(arg) - 1
-                        if 0 <= idx < len(results) and result_type == 'songs':
-                            self.add_to_queue(results[idx])
-                        else:
-                            print(f"{Colors.RED}  Invalid selection.{Colors.RESET}")
-                    else:
-                        print(f"{Colors.YELLOW}  Usage: add <number>{Colors.RESET}")
-                        
-                elif action in ['pa', 'playall']:
-                    if results and result_type == 'songs':
-                        self.queue = results.copy()
-                        self.current_index = 0
-                        print(f"{Colors.GREEN}  Added {len(results)} tracks to queue.{Colors.RESET}")
-                        self.play_track(self.queue[0])
-                    else:
-                        print(f"{Colors.YELLOW}  No songs to add.{Colors.RESET}")
-                        
-                elif action in ['space', 'pause']:
-                    if self.toggle_pause():
-                        status = "Paused" if self.is_paused else "Resumed"
-                        print(f"{Colors.GREEN}  {status}{Colors.RESET}")
-                    else:
-                        print(f"{Colors.YELLOW}  Nothing playing.{Colors.RESET}")
-                        
-                elif action in ['n', 'next']:
-                    self.next_track()
-                    
-                elif action in ['b', 'prev']:
-                    self.prev_track()
-                    
-                elif action == 'stop':
-                    self.stop_playback()
-                    print(f"{Colors.YELLOW}  Playback stopped.{Colors.RESET}")
-                    
-                elif action in ['q', 'queue']:
-                    self.show_queue()
-                    
-                elif action in ['cq', 'clear']:
-                    self.stop_playback()
-                    self.clear_queue()
-                    
-                elif action == '+':
-                    self.seek(10)
-                    print(f"{Colors.DIM}  >> 10s{Colors.RESET}")
-                    
-                elif action == '-':
-                    self.seek(-10)
-                    print(f"{Colors.DIM}  << 10s{Colors.RESET}")
-                    
-                elif action == 'v':
-                    if arg.isdigit():
-                        vol = max(0, min(100, int(arg)))
-                        self.set_volume(vol)
-                        print(f"{Colors.DIM}  Volume: {vol}%{Colors.RESET}")
-                    else:
-                        print(f"{Colors.YELLOW}  Usage: v <0-100>{Colors.RESET}")
-                        
-                elif action == 'cls':
-                    self.clear_screen()
-                    self.print_header()
-                    
+                handler = self._handlers.get(action)
+                if handler:
+                    results, result_type = handler(arg, results, result_type)
                 else:
                     # Treat as search if no command matched
                     results = self.search(cmd, 'songs')
@@ -460,17 +743,8 @@ class YTMusicPlayer:
 
 def check_dependencies():
     """Check if required dependencies are installed"""
-    missing = []
-    
-    try:
-        subprocess.run(['mpv', '--version'], capture_output=True, check=True)
-    except (FileNotFoundError, subprocess.CalledProcessError):
-        missing.append('mpv')
-    
-    try:
-        subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-    except (FileNotFoundError, subprocess.CalledProcessError):
-        missing.append('yt-dlp')
+    # A PATH lookup is enough here; running each tool with --version costs a fork+exec
+    missing = [binary for binary in ('mpv', 'yt-dlp') if shutil.which(binary) is None]
     
     if missing:
         print(f"{Colors.RED}Missing dependencies: {', '.join(missing)}{Colors.RESET}")
@@ -483,19 +757,43 @@ def check_dependencies():
     return True
 
 
+def _save_history():
+    """Write input history to HISTORY_FILE, ignoring I/O errors"""
+    try:
+        readline.write_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+
+
+def enable_history():
+    """Load input history from HISTORY_FILE and save it back on exit"""
+    if readline is None:
+        return
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+    readline.set_history_length(1000)
+    atexit.register(_save_history)
+
+
+def _exit_on_signal(sig, frame):
+    """Turn a termination signal into a normal exit so atexit handlers run"""
+    sys.exit(128 + sig)
+
+
 def main():
     """Entry point for the yt-music command"""
     if not check_dependencies():
         sys.exit(1)
     
+    enable_history()
     player = YTMusicPlayer()
-    
-    def signal_handler(sig, frame):
-        player.stop_playback()
-        print(f"\n{Colors.CYAN}  Goodbye! 🎵{Colors.RESET}\n")
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
+    atexit.register(player.stop_playback)
+    # mpv runs in its own session, so it won't get the terminal's SIGHUP; exit
+    # normally on hangup/termination so the atexit cleanup stops it too
+    for sig in (signal.SIGHUP, signal.SIGTERM):
+        signal.signal(sig, _exit_on_signal)
     
     player.run()
 